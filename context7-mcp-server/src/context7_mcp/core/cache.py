@@ -3,8 +3,9 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
 
 try:
     import redis.asyncio as redis
@@ -12,8 +13,165 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from .config import get_settings
 
+# Maximum number of entries kept by the in-memory fallback cache
+MEMORY_CACHE_MAX_ENTRIES = 1000
+
+# Seconds a Redis INFO snapshot is reused by get_stats
+REDIS_INFO_TTL_SECONDS = 5.0
+
+# Lookup table halving every counter of the frequency sketch in one pass
+_HALVE_TABLE = bytes(i >> 1 for i in range(256))
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize a cache payload, preferring orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, default=str).encode("utf-8")
+
+
+def _loads(data: Any) -> Any:
+    """Deserialize a cache payload produced by ``_dumps``."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _estimate_size(value: Any) -> int:
+    """Estimate the size of a cached value in bytes."""
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return len(_dumps(value))
+
+
+def _retrieve_task_exception(task: asyncio.Task) -> None:
+    """Mark a task's exception as retrieved in case nobody awaits it."""
+    if not task.cancelled():
+        task.exception()
+
+
+class _FrequencySketch:
+    """Count-min sketch estimating how often each key has been accessed."""
+    
+    _DEPTH = 4
+    _WIDTH_BITS = 14
+    _MAX_COUNT = 15
+    
+    def __init__(self, sample_size: int) -> None:
+        self._mask = (1 << self._WIDTH_BITS) - 1
+        self._rows = [bytearray(1 << self._WIDTH_BITS) for _ in range(self._DEPTH)]
+        self._sample_size = sample_size
+        self._additions = 0
+    
+    def _indexes(self, key: str) -> Iterator[int]:
+        h = hash(key)
+        for row in range(self._DEPTH):
+            yield (h >> (row * self._WIDTH_BITS)) & self._mask
+    
+    def increment(self, key: str) -> None:
+        """Record one access to ``key``."""
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self._MAX_COUNT:
+                row[index] += 1
+        
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            # Age all counters so the sketch tracks recent popularity
+            for row in self._rows:
+                row[:] = row.translate(_HALVE_TABLE)
+            self._additions //= 2
+    
+    def estimate(self, key: str) -> int:
+        """Return the estimated access frequency of ``key``."""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+
+class _MemoryCache:
+    """Bounded in-memory store using W-TinyLFU admission.
+    
+    New keys enter a small LRU window. Entries leaving the window are only
+    admitted to the main LRU segment if they have been requested more often
+    than the entry they would evict, which keeps one-off lookups from
+    flushing frequently used documentation.
+    """
+    
+    def __init__(self, capacity: int) -> None:
+        self._window_capacity = max(1, capacity // 100)
+        self._main_capacity = max(1, capacity - self._window_capacity)
+        self._window: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._main: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._sketch = _FrequencySketch(sample_size=capacity * 10)
+        self._sizes: Dict[str, int] = {}
+        self.size_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._window) + len(self._main)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``key`` and mark it as recently used."""
+        self._sketch.increment(key)
+        for segment in (self._main, self._window):
+            data = segment.get(key)
+            if data is not None:
+                segment.move_to_end(key)
+                return data
+        return None
+    
+    def set(self, key: str, data: Dict[str, Any], size: int = 0) -> None:
+        """Insert or replace the entry for ``key``.
+        
+        ``size`` is the caller's estimate of the entry's size in bytes.
+        """
+        self._sketch.increment(key)
+        self.size_bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        
+        for segment in (self._main, self._window):
+            if key in segment:
+                segment[key] = data
+                segment.move_to_end(key)
+                return
+        
+        self._window[key] = data
+        if len(self._window) > self._window_capacity:
+            self._admit(*self._window.popitem(last=False))
+    
+    def _admit(self, key: str, data: Dict[str, Any]) -> None:
+        """Move a window victim into the main segment if it earns its place."""
+        if len(self._main) >= self._main_capacity:
+            victim = next(iter(self._main))
+            if self._sketch.estimate(key) <= self._sketch.estimate(victim):
+                self._forget(key)
+                return
+            del self._main[victim]
+            self._forget(victim)
+        self._main[key] = data
+    
+    def _forget(self, key: str) -> None:
+        """Drop the size accounting for an entry that left the cache."""
+        self.size_bytes -= self._sizes.pop(key, 0)
+    
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+        self._window.pop(key, None)
+        self._main.pop(key, None)
+        self._forget(key)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._window.clear()
+        self._main.clear()
+        self._sizes.clear()
+        self.size_bytes = 0
+
 
 class CacheManager:
     """Manages caching for documentation and library data."""
@@ -22,8 +180,14 @@ class CacheManager:
         self.settings = get_settings()
         self.logger = logging.getLogger(__name__)
         self._redis: Optional[redis.Redis] = None
-        self._memory_cache: Dict[str, Dict[str, Any]] = {}
+        self._pool: Optional[redis.BlockingConnectionPool] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._info_cache: Optional[Dict[str, Any]] = None
+        self._info_expires_at = 0.0
+        self._memory_cache = _MemoryCache(MEMORY_CACHE_MAX_ENTRIES)
         self._cache_enabled = self.settings.REDIS_ENABLED and REDIS_AVAILABLE
+        # Snapshot settings read on every cache operation
+        self._ttl: int = self.settings.CACHE_TTL_SECONDS
         
         if self.settings.REDIS_ENABLED and not REDIS_AVAILABLE:
             self.logger.warning("Redis caching requested but redis package not available")
@@ -32,12 +196,16 @@ class CacheManager:
         """Initialize the cache manager."""
         if self._cache_enabled:
             try:
-                self._redis = redis.from_url(
+                # Size the pool for concurrent requests plus pipelined bursts
+                self._pool = redis.BlockingConnectionPool.from_url(
                     self.settings.REDIS_URL,
-                    decode_responses=True,
+                    max_connections=self.settings.MAX_CONCURRENT_REQUESTS * 2,
+                    timeout=5,
+                    decode_responses=False,
                     socket_connect_timeout=5,
                     socket_timeout=5
                 )
+                self._redis = redis.Redis(connection_pool=self._pool)
                 
                 # Test connection
                 await self._redis.ping()
@@ -47,6 +215,9 @@ class CacheManager:
                 self.logger.warning(f"Failed to initialize Redis cache: {e}")
                 self._cache_enabled = False
                 self._redis = None
+                if self._pool:
+                    await self._pool.disconnect()
+                    self._pool = None
         
         if not self._cache_enabled:
             self.logger.info("Using in-memory cache")
@@ -55,22 +226,24 @@ class CacheManager:
         """Get value from cache."""
         try:
             if self._cache_enabled and self._redis:
+                # Redis expires keys itself, so values are stored unwrapped
                 value = await self._redis.get(key)
-                if value:
-                    data = json.loads(value)
-                    # Check expiration
-                    if self._is_expired(data):
-                        await self._redis.delete(key)
-                        return None
-                    return data.get("value")
+                if value is not None:
+                    return _loads(value)
             else:
-                # Memory cache
-                if key in self._memory_cache:
-                    data = self._memory_cache[key]
-                    if self._is_expired(data):
-                        del self._memory_cache[key]
-                        return None
-                    return data.get("value")
+                return self._memory_get(key)
+                    
+        except Exception as e:
+            self.logger.error(f"Cache get error for key {key}: {e}")
+        
+        return None
+    
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get a pre-serialized value stored with ``set_raw``."""
+        try:
+            if self._cache_enabled and self._redis:
+                return await self._redis.get(key)
+            return self._memory_get(key)
                     
         except Exception as e:
             self.logger.error(f"Cache get error for key {key}: {e}")
@@ -85,45 +258,147 @@ class CacheManager:
     ) -> None:
         """Set value in cache."""
         if ttl is None:
-            ttl = self.settings.CACHE_TTL_SECONDS
-        
-        expiry = datetime.utcnow() + timedelta(seconds=ttl)
-        cache_data = {
-            "value": value,
-            "expires_at": expiry.isoformat(),
-            "created_at": datetime.utcnow().isoformat()
-        }
+            ttl = self._ttl
         
         try:
             if self._cache_enabled and self._redis:
-                await self._redis.setex(
-                    key, 
-                    ttl, 
-                    json.dumps(cache_data, default=str)
-                )
+                await self._redis.set(key, _dumps(value), ex=ttl)
             else:
-                # Memory cache with size limit
-                if len(self._memory_cache) > 1000:  # Simple size limit
-                    # Remove oldest entries
-                    oldest_keys = sorted(
-                        self._memory_cache.keys(),
-                        key=lambda k: self._memory_cache[k].get("created_at", "")
-                    )[:100]
-                    for old_key in oldest_keys:
-                        del self._memory_cache[old_key]
+                self._memory_cache.set(
+                    key, self._wrap(value, ttl), _estimate_size(value)
+                )
                 
-                self._memory_cache[key] = cache_data
+        except Exception as e:
+            self.logger.error(f"Cache set error for key {key}: {e}")
+    
+    async def set_raw(
+        self, 
+        key: str, 
+        data: bytes, 
+        ttl: Optional[int] = None
+    ) -> None:
+        """Set an already serialized value in cache, storing it verbatim."""
+        if ttl is None:
+            ttl = self._ttl
+        
+        try:
+            if self._cache_enabled and self._redis:
+                await self._redis.set(key, data, ex=ttl)
+            else:
+                self._memory_cache.set(key, self._wrap(data, ttl), len(data))
                 
         except Exception as e:
             self.logger.error(f"Cache set error for key {key}: {e}")
     
+    async def get_or_set(
+        self, 
+        key: str, 
+        factory: Callable[[], Awaitable[Any]], 
+        ttl: Optional[int] = None,
+        raw: bool = False,
+        skip_lookup: bool = False
+    ) -> Any:
+        """Get value from cache, computing and storing it on a miss.
+        
+        Concurrent misses on the same key share a single call to
+        ``factory`` instead of each computing the value. With ``raw=True``
+        the factory must return bytes, which are stored via ``set_raw``.
+        Callers that have just missed on ``key`` themselves can pass
+        ``skip_lookup=True`` to avoid reading the cache a second time.
+        """
+        if not skip_lookup:
+            value = await (self.get_raw(key) if raw else self.get(key))
+            if value is not None:
+                return value
+        
+        task = self._inflight.get(key)
+        if task is None:
+            # The fetch and cache write run in their own task, so cancelling
+            # whichever caller started them never cancels the other callers
+            task = asyncio.ensure_future(self._compute_and_store(key, factory, ttl, raw))
+            task.add_done_callback(_retrieve_task_exception)
+            self._inflight[key] = task
+        
+        # Shield so a cancelled caller does not cancel the shared task
+        return await asyncio.shield(task)
+    
+    async def _compute_and_store(
+        self, 
+        key: str, 
+        factory: Callable[[], Awaitable[Any]], 
+        ttl: Optional[int],
+        raw: bool
+    ) -> Any:
+        """Run a ``get_or_set`` factory and cache its result."""
+        try:
+            value = await factory()
+            if raw:
+                await self.set_raw(key, value, ttl)
+            else:
+                await self.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get multiple values from cache in a single round-trip.
+        
+        Returns a mapping containing only the keys that were found.
+        """
+        results: Dict[str, Any] = {}
+        
+        try:
+            if self._cache_enabled and self._redis:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.get(key)
+                    values = await pipe.execute()
+                
+                for key, value in zip(keys, values):
+                    if value is not None:
+                        results[key] = _loads(value)
+            else:
+                for key in keys:
+                    value = await self.get(key)
+                    if value is not None:
+                        results[key] = value
+                        
+        except Exception as e:
+            self.logger.error(f"Cache get_many error for {len(keys)} keys: {e}")
+        
+        return results
+    
+    async def set_many(
+        self, 
+        items: Dict[str, Any], 
+        ttl: Optional[int] = None
+    ) -> None:
+        """Set multiple values in cache in a single round-trip."""
+        if ttl is None:
+            ttl = self._ttl
+        
+        try:
+            if self._cache_enabled and self._redis:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key, value in items.items():
+                        pipe.set(key, _dumps(value), ex=ttl)
+                    await pipe.execute()
+            else:
+                for key, value in items.items():
+                    self._memory_cache.set(
+                        key, self._wrap(value, ttl), _estimate_size(value)
+                    )
+                    
+        except Exception as e:
+            self.logger.error(f"Cache set_many error for {len(items)} keys: {e}")
+    
     async def delete(self, key: str) -> None:
         """Delete value from cache."""
         try:
             if self._cache_enabled and self._redis:
                 await self._redis.delete(key)
             else:
-                self._memory_cache.pop(key, None)
+                self._memory_cache.delete(key)
                 
         except Exception as e:
             self.logger.error(f"Cache delete error for key {key}: {e}")
@@ -139,18 +414,33 @@ class CacheManager:
         except Exception as e:
             self.logger.error(f"Cache clear error: {e}")
     
+    def _memory_get(self, key: str) -> Optional[Any]:
+        """Get an unexpired value from the in-memory cache."""
+        data = self._memory_cache.get(key)
+        if data is None:
+            return None
+        if self._is_expired(data):
+            self._memory_cache.delete(key)
+            return None
+        return data.get("value")
+    
+    def _wrap(self, value: Any, ttl: int) -> Dict[str, Any]:
+        """Wrap a value with expiry metadata for the in-memory cache."""
+        return {
+            "value": value,
+            "expires_at": time.time() + ttl
+        }
+    
     def _is_expired(self, cache_data: Dict[str, Any]) -> bool:
         """Check if cache entry is expired."""
         try:
-            expires_at = datetime.fromisoformat(cache_data.get("expires_at", ""))
-            return datetime.utcnow() > expires_at
-        except (ValueError, TypeError):
+            return time.time() > cache_data["expires_at"]
+        except (KeyError, TypeError):
             return True
     
     def get_cache_key(self, prefix: str, *args: str) -> str:
         """Generate cache key."""
-        key_parts = [prefix] + list(args)
-        return ":".join(key_parts)
+        return ":".join((prefix, *args))
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -161,7 +451,7 @@ class CacheManager:
         
         try:
             if self._cache_enabled and self._redis:
-                info = await self._redis.info()
+                info = await self._get_redis_info()
                 stats.update({
                     "redis_version": info.get("redis_version"),
                     "used_memory": info.get("used_memory_human"),
@@ -171,7 +461,7 @@ class CacheManager:
             else:
                 stats.update({
                     "memory_entries": len(self._memory_cache),
-                    "estimated_size_mb": len(str(self._memory_cache)) / (1024 * 1024)
+                    "estimated_size_mb": self._memory_cache.size_bytes / (1024 * 1024)
                 })
                 
         except Exception as e:
@@ -180,22 +470,42 @@ class CacheManager:
         
         return stats
     
+    async def _get_redis_info(self) -> Dict[str, Any]:
+        """Return Redis INFO, reusing a recent snapshot when available."""
+        now = time.monotonic()
+        if self._info_cache is None or now >= self._info_expires_at:
+            self._info_cache = await self._redis.info()
+            self._info_expires_at = now + REDIS_INFO_TTL_SECONDS
+        return self._info_cache
+    
     async def close(self) -> None:
         """Close cache connections."""
         if self._redis:
             await self._redis.close()
+        if self._pool:
+            await self._pool.disconnect()
 
 
 # Global cache manager instance
 _cache_manager: Optional[CacheManager] = None
+_cache_manager_lock = asyncio.Lock()
 
 
-async def get_cache_manager() -> CacheManager:
-    """Get or create cache manager instance."""
+async def ensure_cache_manager() -> CacheManager:
+    """Create and initialize the cache manager once, typically at startup."""
     global _cache_manager
     
-    if _cache_manager is None:
-        _cache_manager = CacheManager()
-        await _cache_manager.initialize()
+    async with _cache_manager_lock:
+        if _cache_manager is None:
+            manager = CacheManager()
+            await manager.initialize()
+            _cache_manager = manager
     
-    return _cache_manager
\ No newline at end of file
+    return _cache_manager
+
+
+async def get_cache_manager() -> CacheManager:
+    """Get or create cache manager instance."""
+    if _cache_manager is not None:
+        return _cache_manager
+    return await ensure_cache_manager()
@@ -34,6 +34,11 @@ class Settings(BaseSettings):
     MAX_DOC_SIZE_MB: int = Field(default=10, env="MAX_DOC_SIZE_MB")
     DEFAULT_TOKEN_LIMIT: int = Field(default=10000, env="DEFAULT_TOKEN_LIMIT")
     CACHE_TTL_SECONDS: int = Field(default=3600, env="CACHE_TTL_SECONDS")
+    MAX_CONCURRENT_SOURCES: int = Field(default=8, env="MAX_CONCURRENT_SOURCES")
+    PAGE_VALIDATOR_TTL_SECONDS: int = Field(
+        default=86400, env="PAGE_VALIDATOR_TTL_SECONDS"
+    )
+    LOCAL_CACHE_TTL_SECONDS: int = Field(default=60, env="LOCAL_CACHE_TTL_SECONDS")
     
     # Library Registry
     LIBRARY_REGISTRY_URL: str = Field(
@@ -3,26 +3,50 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
+import orjson
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 
+from .cache import ensure_cache_manager
 from .server import Context7MCPServer
 from .config import get_settings
 
+# The SSE greeting never changes, so it is serialized once at import
+_CONNECTED_FRAME = (
+    b"data: " + orjson.dumps({"type": "connected", "server": "context7-mcp"}) + b"\n\n"
+).decode()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 
 def create_app(sse: bool = False) -> FastAPI:
     """Create FastAPI application."""
     settings = get_settings()
     
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        """Set up shared resources before serving requests."""
+        await ensure_cache_manager()
+        yield
+        await mcp_server.close()
+    
     app = FastAPI(
         title="Context7 MCP Server",
         description="Up-to-date code documentation for LLMs",
         version=settings.VERSION,
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
     
     # Add CORS middleware
@@ -69,9 +93,10 @@ def create_app(sse: bool = False) -> FastAPI:
             
             async def event_stream():
                 """Generate SSE events."""
+                loop = asyncio.get_running_loop()
                 try:
                     # Send initial connection event
-                    yield f"data: {json.dumps({'type': 'connected', 'server': 'context7-mcp'})}\n\n"
+                    yield _CONNECTED_FRAME
                     
                     # Keep connection alive and handle incoming messages
                     # This is a simplified implementation - in production you'd want
@@ -79,12 +104,14 @@ def create_app(sse: bool = False) -> FastAPI:
                     while True:
                         # In a real implementation, you'd read from a queue or websocket
                         # For now, just keep the connection alive
-                        yield f"data: {json.dumps({'type': 'ping', 'timestamp': str(asyncio.get_event_loop().time())})}\n\n"
+                        timestamp = loop.time()
+                        # A float repr needs no JSON escaping
+                        yield f'data: {{"type":"ping","timestamp":"{timestamp}"}}\n\n'
                         await asyncio.sleep(30)  # Ping every 30 seconds
                         
                 except Exception as e:
                     logger.error(f"SSE stream error: {e}")
-                    yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+                    yield f"data: {orjson.dumps({'type': 'error', 'message': str(e)}).decode()}\n\n"
             
             return StreamingResponse(
                 event_stream(),
@@ -1,11 +1,26 @@
 """Data models for Context7 MCP Server."""
 
+from contextvars import ContextVar
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
+import orjson
 from pydantic import BaseModel, Field, HttpUrl
 
+# Timestamp shared by every model created while handling one request
+_request_time: ContextVar[Optional[datetime]] = ContextVar("_request_time", default=None)
+
+
+def mark_request_time() -> None:
+    """Pin the timestamp used for model defaults in the current context."""
+    _request_time.set(datetime.utcnow())
+
+
+def _utcnow() -> datetime:
+    """Return the current request's timestamp, or the current UTC time."""
+    return _request_time.get() or datetime.utcnow()
+
 
 class SourceType(str, Enum):
     """Documentation source types."""
@@ -41,7 +56,7 @@ class LibraryInfo(BaseModel):
         default=None, description="Package manager (npm, pypi, etc.)"
     )
     tags: List[str] = Field(default_factory=list, description="Library tags/categories")
-    last_updated: datetime = Field(default_factory=datetime.utcnow)
+    last_updated: datetime = Field(default_factory=_utcnow)
     popularity_score: float = Field(default=0.0, ge=0.0, le=1.0)
 
 
@@ -53,7 +68,7 @@ class DocumentationContent(BaseModel):
     source_type: SourceType
     topic: Optional[str] = None
     token_count: int
-    last_fetched: datetime = Field(default_factory=datetime.utcnow)
+    last_fetched: datetime = Field(default_factory=_utcnow)
     quality_score: float = Field(default=0.0, ge=0.0, le=1.0)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
@@ -96,4 +111,19 @@ class MCPToolCall(BaseModel):
 class MCPToolResult(BaseModel):
     """MCP tool call result."""
     content: List[Dict[str, Any]]
-    isError: bool = False
\ No newline at end of file
+    isError: bool = False
+
+
+def dumps(model: BaseModel, **kwargs: Any) -> bytes:
+    """Serialize a model to JSON bytes with orjson.
+    
+    Keyword arguments are passed through to ``model_dump``. For the
+    content-heavy documentation responses this is faster than pydantic's
+    own ``model_dump_json``, and reading the bytes back with
+    ``orjson.loads`` + ``model_validate`` beats ``model_validate_json``.
+    """
+    return orjson.dumps(
+        model.model_dump(mode="python", **kwargs),
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS
+    )
@@ -1,16 +1,23 @@
 """Core MCP server implementation."""
 
 import asyncio
-import json
 import logging
+import os
+import stat
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
+import orjson
+
+from .cache import ensure_cache_manager
 from .config import get_settings
-from .models import MCPToolCall, MCPToolResult
+from .models import MCPToolCall, MCPToolResult, mark_request_time
 from ..tools.library_resolver import LibraryResolver
 from ..tools.documentation_fetcher import DocumentationFetcher
 
+# Longest JSON-RPC line accepted on stdin
+STDIN_LINE_LIMIT = 16 * 1024 * 1024
+
 
 class Context7MCPServer:
     """Context7 MCP Server implementation."""
@@ -63,50 +70,136 @@ class Context7MCPServer:
                 }
             }
         }
+        
+        # Tool descriptors never change after startup, so build them once
+        self._tools_list_payload: List[Dict[str, Any]] = [
+            {
+                "name": tool_name,
+                "description": tool_info["description"],
+                "inputSchema": tool_info["inputSchema"]
+            }
+            for tool_name, tool_info in self.capabilities["tools"].items()
+        ]
     
     async def run_stdio(self) -> None:
         """Run the server with STDIO transport."""
         self.logger.info("Starting STDIO transport")
         
         try:
+            await ensure_cache_manager()
+            read_line = await self._open_stdin()
+            
             while True:
                 # Read JSON-RPC message from stdin
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, sys.stdin.readline
-                )
+                try:
+                    line = await read_line()
+                except ValueError as e:
+                    # Line exceeded STDIN_LINE_LIMIT and was discarded
+                    self.logger.error(f"Invalid message received: {e}")
+                    error_response = self.create_error_response(
+                        None, -32700, "Parse error"
+                    )
+                    self._write_message(error_response)
+                    continue
                 
                 if not line:
                     break
                 
                 try:
-                    message = json.loads(line.strip())
+                    message = orjson.loads(line)
                     response = await self.handle_message(message)
                     
                     if response:
                         # Write response to stdout
-                        print(json.dumps(response), flush=True)
+                        self._write_message(response)
                         
-                except json.JSONDecodeError as e:
+                except orjson.JSONDecodeError as e:
                     self.logger.error(f"Invalid JSON received: {e}")
                     error_response = self.create_error_response(
                         None, -32700, "Parse error"
                     )
-                    print(json.dumps(error_response), flush=True)
+                    self._write_message(error_response)
                     
                 except Exception as e:
                     self.logger.error(f"Error handling message: {e}")
                     error_response = self.create_error_response(
                         None, -32603, "Internal error"
                     )
-                    print(json.dumps(error_response), flush=True)
+                    self._write_message(error_response)
                     
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal")
         except Exception as e:
             self.logger.error(f"STDIO transport error: {e}")
+        finally:
+            await self.close()
+    
+    async def close(self) -> None:
+        """Close the HTTP sessions held by the server's tools."""
+        await self.library_resolver.close()
+        await self.documentation_fetcher.close()
+    
+    async def _open_stdin(self) -> Callable[[], Awaitable[bytes]]:
+        """Return a coroutine function reading one line from stdin."""
+        loop = asyncio.get_running_loop()
+        
+        def read_blocking() -> Awaitable[bytes]:
+            return loop.run_in_executor(None, sys.stdin.buffer.readline)
+        
+        # Only pipes and sockets can be read as pipes; for anything else, such
+        # as regular files or /dev/null, uvloop aborts the process instead of
+        # raising, so those never reach connect_read_pipe
+        mode = os.fstat(sys.stdin.fileno()).st_mode
+        if not (stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)):
+            return read_blocking
+        
+        reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+        try:
+            await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+            )
+        except (NotImplementedError, ValueError, OSError):
+            # Some platforms cannot read stdin as a pipe
+            return read_blocking
+        
+        return lambda: self._read_stream_line(reader)
+    
+    async def _read_stream_line(self, reader: asyncio.StreamReader) -> bytes:
+        """Read one line from a stream, skipping the whole of an oversized line.
+        
+        Returns the partial last line (empty at a clean end of input) and
+        raises ValueError once per line longer than the reader's limit.
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError:
+            pass
+        
+        # Discard up to the next newline, even if it has not arrived yet, so the
+        # rest of the line is not read as another message
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                break
+            except asyncio.LimitOverrunError as e:
+                # The scanned bytes hold no newline, or end right before it
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                break
+        
+        raise ValueError("Line exceeds STDIN_LINE_LIMIT")
+    
+    def _write_message(self, message: Dict[str, Any]) -> None:
+        """Write a JSON-RPC message to stdout as a single line."""
+        sys.stdout.buffer.write(orjson.dumps(message) + b"\n")
+        sys.stdout.buffer.flush()
     
     async def handle_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Handle incoming MCP message."""
+        mark_request_time()
+        
         method = message.get("method")
         params = message.get("params", {})
         msg_id = message.get("id")
@@ -157,20 +250,11 @@ class Context7MCPServer:
     
     async def handle_tools_list(self, msg_id: Optional[str]) -> Dict[str, Any]:
         """Handle tools/list request."""
-        tools = []
-        
-        for tool_name, tool_info in self.capabilities["tools"].items():
-            tools.append({
-                "name": tool_name,
-                "description": tool_info["description"],
-                "inputSchema": tool_info["inputSchema"]
-            })
-        
         return {
             "jsonrpc": "2.0",
             "id": msg_id,
             "result": {
-                "tools": tools
+                "tools": self._tools_list_payload
             }
         }
     
@@ -13,6 +13,12 @@ from rich.logging import RichHandler
 from .core.server import Context7MCPServer
 from .core.config import get_settings
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 app = typer.Typer(help="Context7 MCP Server - Up-to-date code documentation for LLMs")
 console = Console()
 
@@ -51,7 +57,9 @@ def serve(
     
     if transport == "stdio":
         # STDIO transport for MCP clients
-        asyncio.run(run_stdio_server())
+        loop_factory = uvloop.new_event_loop if UVLOOP_AVAILABLE else None
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(run_stdio_server())
     elif transport in ["http", "sse"]:
         # HTTP/SSE transport
         run_http_server(host, port, transport == "sse")
@@ -71,6 +79,8 @@ def run_http_server(host: str, port: int, sse: bool = False) -> None:
     from .core.http_server import create_app
     
     app = create_app(sse=sse)
+    # uvicorn's default loop="auto"/http="auto" already pick uvloop and
+    # httptools when installed (both ship with uvicorn[standard])
     uvicorn.run(
         app,
         host=host,
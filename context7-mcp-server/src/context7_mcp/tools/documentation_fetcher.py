@@ -3,12 +3,15 @@
 import asyncio
 import logging
 import re
-from typing import Dict, List, Optional
+import time
+from collections import OrderedDict
+from typing import ClassVar, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 import aiohttp
+import orjson
+import html2text
 from bs4 import BeautifulSoup
-from markdownify import markdownify
 
 from ..core.config import get_settings
 from ..core.models import (
@@ -16,39 +19,245 @@ from ..core.models import (
     DocumentationRequest, 
     DocumentationResponse,
     LibraryInfo,
-    SourceType
+    SourceType,
+    dumps
 )
 from ..core.cache import get_cache_manager
 from .library_resolver import LibraryResolver
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Patterns used to clean converted markdown
+_RE_BLANKLINES = re.compile(r'\n\s*\n\s*\n')
+_RE_EMPTY_LINK = re.compile(r'\[\]\([^)]*\)')
+_RE_EMPTY_CODE = re.compile(r'```\s*\n\s*```')
+_RE_HEADING = re.compile(r'^#+\s', re.MULTILINE)
+
+# Characters per token assumed by the token estimate
+CHARS_PER_TOKEN = 4
+
+# Appended to content cut down to a token limit
+TRUNCATION_MARKER = "\n\n[Content truncated...]"
+
+# Token budgets documentation is fetched and cached at
+TOKEN_BUDGET_BUCKETS = (1000, 2000, 4000, 8000, 16000, 32000)
+
+# Responses kept in the per-process cache in front of the cache manager
+LOCAL_CACHE_MAX_ENTRIES = 128
+
+# Response bodies are streamed in chunks of this many bytes
+READ_CHUNK_SIZE = 65536
+
+# Marker byte prefixed to cached response payloads
+_PAYLOAD_PLAIN = b"j"
+_PAYLOAD_ZSTD = b"z"
+
+if ZSTD_AVAILABLE:
+    _ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3)
+    _ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+
+# Responses in these formats are used as-is instead of converted from HTML
+TEXT_CONTENT_TYPES = frozenset({"text/markdown", "text/x-markdown", "text/plain"})
+TEXT_FILE_EXTENSIONS = (".md", ".rst", ".txt")
+HTML_CONTENT_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+
+# Page chrome removed before converting HTML to markdown
+STRIPPED_TAGS = ["script", "style", "nav", "footer", "header"]
+_STRIPPED_TAG_SET = frozenset(STRIPPED_TAGS)
+
+# Candidate main-content containers, in order of preference
+MAIN_CONTENT_SELECTORS = [
+    'main', 
+    '.content', 
+    '.documentation', 
+    '.docs', 
+    '#content',
+    'article',
+    '.markdown-body'
+]
+
+
+def _token_budget(max_tokens: int) -> int:
+    """Round a token limit up to the next cache budget bucket."""
+    for bucket in TOKEN_BUDGET_BUCKETS:
+        if max_tokens <= bucket:
+            return bucket
+    # Beyond the ladder, limits are cached exactly
+    return max_tokens
+
+
+def _decode_body(body: bytes, charset: Optional[str]) -> str:
+    """Decode a response body using its declared charset."""
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset label in the Content-Type header
+        return body.decode("utf-8", errors="replace")
+
+
+def _strip_html_comments(content: str) -> str:
+    """Remove ``<!-- ... -->`` comments from text.
+    
+    Equivalent to substituting ``<!--.*?-->`` with DOTALL, but linear in the
+    input: each unclosed ``<!--`` would make the regex rescan to the end.
+    """
+    start = content.find('<!--')
+    if start < 0:
+        return content
+    
+    parts = []
+    pos = 0
+    while start >= 0:
+        end = content.find('-->', start + 4)
+        if end < 0:
+            # No terminator anywhere after this point
+            break
+        parts.append(content[pos:start])
+        pos = end + 3
+        start = content.find('<!--', pos)
+    
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def _pack_payload(payload: bytes) -> bytes:
+    """Prefix a serialized response with its marker, compressing it if possible."""
+    if ZSTD_AVAILABLE:
+        return _PAYLOAD_ZSTD + _ZSTD_COMPRESSOR.compress(payload)
+    return _PAYLOAD_PLAIN + payload
+
+
+def _unpack_payload(payload: bytes) -> Optional[bytes]:
+    """Return the JSON bytes of a cached response, or None if undecodable."""
+    marker, body = payload[:1], payload[1:]
+    if marker == _PAYLOAD_ZSTD:
+        return _ZSTD_DECOMPRESSOR.decompress(body) if ZSTD_AVAILABLE else None
+    if marker == _PAYLOAD_PLAIN:
+        return body
+    # Entries cached before payloads carried a marker
+    return payload
+
 
 class DocumentationFetcher:
     """Fetches and processes documentation from various sources."""
     
+    # One keep-alive pool per process, shared by every fetcher instance. Each
+    # fetcher that uses it holds a reference until its close(); the session
+    # is closed when the last holder lets go.
+    _session: ClassVar[Optional[aiohttp.ClientSession]] = None
+    _session_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    _session_holders: ClassVar[int] = 0
+    
     def __init__(self) -> None:
         self.settings = get_settings()
         self.logger = logging.getLogger(__name__)
         self.library_resolver = LibraryResolver()
-        self._session: Optional[aiohttp.ClientSession] = None
         self._cache_manager = None
-        
-        # Token counting regex (approximate)
-        self._token_pattern = re.compile(r'\b\w+\b|[^\w\s]')
+        self._holds_session = False
+        self._local_cache: "OrderedDict[str, Tuple[float, DocumentationResponse]]" = (
+            OrderedDict()
+        )
     
     async def __aenter__(self):
         """Async context manager entry."""
-        self._session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                "User-Agent": "Context7-MCP-Server/0.1.0 (Documentation Fetcher)"
-            }
-        )
+        await self._ensure_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self._session:
-            await self._session.close()
+        await self.close()
+    
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, holding a reference to it."""
+        if not self._holds_session:
+            self._holds_session = True
+            type(self)._session_holders += 1
+        return await self._shared_session()
+    
+    @classmethod
+    async def _shared_session(cls) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if cls._session is not None and cls._session_loop is not loop:
+            # Sessions are bound to the loop they were created on
+            await cls._close_stale_session(cls._session, cls._session_loop)
+            cls._session = None
+        
+        if cls._session is None or cls._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=8,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            cls._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30, sock_read=10),
+                headers={
+                    "User-Agent": "Context7-MCP-Server/0.1.0 (Documentation Fetcher)"
+                }
+            )
+            cls._session_loop = loop
+        return cls._session
+    
+    @staticmethod
+    async def _close_stale_session(
+        session: aiohttp.ClientSession, 
+        loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Close a session created on another event loop."""
+        if session.closed:
+            return
+        
+        try:
+            if loop is not None and loop.is_running():
+                # Still serving another thread; close it there
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), loop)
+                )
+            else:
+                # Its loop has finished; release the session and connector here
+                await session.close()
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Error closing stale HTTP session: {e}")
+    
+    async def close(self) -> None:
+        """Release the resolver's session and this fetcher's hold on the shared one."""
+        await self.library_resolver.close()
+        
+        if self._holds_session:
+            self._holds_session = False
+            cls = type(self)
+            cls._session_holders -= 1
+            if cls._session_holders == 0:
+                await cls.close_session()
+    
+    @classmethod
+    async def close_session(cls) -> None:
+        """Close the shared HTTP session, even if other fetchers still hold it.
+        
+        Holders transparently get a new session on their next fetch.
+        """
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
     
     async def fetch_documentation(
         self, 
@@ -63,30 +272,127 @@ class DocumentationFetcher:
         if not self._cache_manager:
             self._cache_manager = await get_cache_manager()
         
+        # Requests share entries fetched at the next budget up the ladder
+        budget = _token_budget(max_tokens)
+        response = await self._fetch_budgeted(library_id, topic, budget)
+        return self._fit_to_budget(response, max_tokens)
+    
+    async def _fetch_budgeted(
+        self, 
+        library_id: str, 
+        topic: Optional[str],
+        budget: int
+    ) -> DocumentationResponse:
+        """Fetch documentation at a bucketed token budget, using the caches."""
         # Check cache first
         cache_key = self._cache_manager.get_cache_key(
-            "docs", library_id, topic or "default", str(max_tokens)
+            "docs", library_id, topic or "default", str(budget)
+        )
+        
+        local_response = self._local_get(cache_key)
+        if local_response is not None:
+            return local_response
+        
+        cached_payload = await self._cache_manager.get_raw(cache_key)
+        if cached_payload:
+            response = self._load_cached_response(cached_payload)
+            if response is not None:
+                self.logger.info(f"Returning cached documentation for {library_id}")
+                self._local_set(cache_key, response)
+                return response
+            
+            # Unreadable here; treat it as a miss and overwrite it
+            await self._cache_manager.delete(cache_key)
+        
+        # Concurrent misses for the same key share one fetch; the lookup
+        # above already missed, so get_or_set need not read the cache again
+        payload = await self._cache_manager.get_or_set(
+            cache_key,
+            lambda: self._fetch_uncached(library_id, topic, budget),
+            ttl=self.settings.CACHE_TTL_SECONDS,
+            raw=True,
+            skip_lookup=True
         )
         
-        cached_result = await self._cache_manager.get(cache_key)
-        if cached_result:
-            self.logger.info(f"Returning cached documentation for {library_id}")
-            cached_result["cached"] = True
-            return DocumentationResponse(**cached_result)
+        # Always freshly packed by this process, so it can be unpacked here
+        response = DocumentationResponse.model_validate(
+            orjson.loads(_unpack_payload(payload))
+        )
+        self._local_set(cache_key, response)
+        return response
+    
+    def _load_cached_response(self, cached_payload: bytes) -> Optional[DocumentationResponse]:
+        """Decode a cached response, or return None if it cannot be used.
+        
+        Entries compressed by an instance with zstd support, and entries in
+        the cache manager's former ``{"value": ..., "expires_at": ...}``
+        wrapper, are not readable as responses.
+        """
+        try:
+            payload = _unpack_payload(cached_payload)
+            if payload is None:
+                return None
+            
+            data = orjson.loads(payload)
+            data["cached"] = True
+            return DocumentationResponse.model_validate(data)
+        except Exception as e:
+            self.logger.warning(f"Discarding unreadable cached documentation: {e}")
+            return None
+    
+    def _fit_to_budget(
+        self, 
+        response: DocumentationResponse, 
+        max_tokens: int
+    ) -> DocumentationResponse:
+        """Truncate a response fetched at a larger budget to the caller's limit."""
+        if response.token_count <= max_tokens:
+            return response
+        
+        content = self._truncate_content(response.content, max_tokens)
+        quality_score, token_count = self._score_and_count(content)
+        return response.model_copy(update={
+            "content": content,
+            "token_count": token_count,
+            "quality_score": quality_score
+        })
+    
+    def _local_get(self, key: str) -> Optional[DocumentationResponse]:
+        """Get a response from the per-process cache."""
+        entry = self._local_cache.get(key)
+        if entry is None:
+            return None
         
+        expires_at, response = entry
+        if time.monotonic() > expires_at:
+            del self._local_cache[key]
+            return None
+        
+        self._local_cache.move_to_end(key)
+        return response.model_copy(update={"cached": True})
+    
+    def _local_set(self, key: str, response: DocumentationResponse) -> None:
+        """Store a response in the per-process cache, evicting the oldest entry."""
+        expires_at = time.monotonic() + self.settings.LOCAL_CACHE_TTL_SECONDS
+        self._local_cache[key] = (expires_at, response)
+        self._local_cache.move_to_end(key)
+        
+        if len(self._local_cache) > LOCAL_CACHE_MAX_ENTRIES:
+            self._local_cache.popitem(last=False)
+    
+    async def _fetch_uncached(
+        self, 
+        library_id: str, 
+        topic: Optional[str],
+        max_tokens: int
+    ) -> bytes:
+        """Fetch documentation from the library's sources, bypassing the cache."""
         # Get library information
         library = await self.library_resolver.get_library_by_id(library_id)
         if not library:
             raise ValueError(f"Library not found: {library_id}")
         
-        # Initialize session if not already done
-        if not self._session:
-            self._session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30),
-                headers={
-                    "User-Agent": "Context7-MCP-Server/0.1.0 (Documentation Fetcher)"
-                }
-            )
+        await self._ensure_session()
         
         # Fetch from multiple sources
         all_content = []
@@ -98,21 +404,37 @@ class DocumentationFetcher:
             key=lambda x: x.priority
         )
         
-        for source in sorted_sources:
-            try:
-                content = await self._fetch_from_source(source, library, topic)
-                if content:
-                    all_content.append(content)
-                    sources_used.append(str(source.url))
-                    
-                    # Check if we have enough content
-                    total_tokens = sum(self._count_tokens(c.content) for c in all_content)
-                    if total_tokens >= max_tokens:
-                        break
+        # Fetch all sources concurrently, bounded by the semaphore
+        semaphore = asyncio.BoundedSemaphore(self.settings.MAX_CONCURRENT_SOURCES)
+        
+        async def fetch_bounded(source) -> Optional[DocumentationContent]:
+            async with semaphore:
+                return await self._fetch_from_source(source, library, topic)
+        
+        tasks = [asyncio.create_task(fetch_bounded(source)) for source in sorted_sources]
+        total_tokens = 0
+        
+        try:
+            # Consume results in priority order so the stopping rule is unchanged
+            for source, task in zip(sorted_sources, tasks):
+                try:
+                    content = await task
+                    if content:
+                        all_content.append(content)
+                        sources_used.append(str(source.url))
                         
-            except Exception as e:
-                self.logger.warning(f"Failed to fetch from {source.url}: {e}")
-                continue
+                        # Check if we have enough content
+                        total_tokens += content.token_count
+                        if total_tokens >= max_tokens:
+                            break
+                            
+                except Exception as e:
+                    self.logger.warning(f"Failed to fetch from {source.url}: {e}")
+                    continue
+        finally:
+            # Lower-priority sources are not needed once the budget is met
+            for task in tasks:
+                task.cancel()
         
         if not all_content:
             raise ValueError(f"No documentation could be fetched for {library_id}")
@@ -120,14 +442,15 @@ class DocumentationFetcher:
         # Combine and process content
         combined_content = await self._combine_content(all_content, topic, max_tokens)
         
+        quality_score, token_count = self._score_and_count(combined_content)
         result = DocumentationResponse(
             library_id=library_id,
             content=combined_content,
             sources=sources_used,
-            token_count=self._count_tokens(combined_content),
+            token_count=token_count,
             topic=topic,
             cached=False,
-            quality_score=self._calculate_quality_score(combined_content),
+            quality_score=quality_score,
             metadata={
                 "library_name": library.name,
                 "sources_count": len(sources_used),
@@ -135,14 +458,7 @@ class DocumentationFetcher:
             }
         )
         
-        # Cache the result
-        await self._cache_manager.set(
-            cache_key, 
-            result.dict(exclude={"cached"}),
-            ttl=self.settings.CACHE_TTL_SECONDS
-        )
-        
-        return result
+        return _pack_payload(dumps(result, exclude={"cached"}))
     
     async def _fetch_from_source(
         self, 
@@ -182,52 +498,87 @@ class DocumentationFetcher:
             f"{base_url}/raw/master/README.md"
         ]
         
-        content_parts = []
-        
-        # Fetch README
-        for readme_url in readme_urls:
-            try:
-                async with self._session.get(readme_url) as response:
-                    if response.status == 200:
-                        readme_content = await response.text()
-                        content_parts.append(f"# README\n\n{readme_content}")
-                        break
-            except Exception:
-                continue
-        
-        # Try to fetch docs folder if topic is specified
+        docs_urls = []
         if topic:
+            # Try to fetch docs folder if topic is specified
             docs_urls = [
                 f"{base_url}/blob/main/docs/{topic}.md",
                 f"{base_url}/blob/master/docs/{topic}.md",
                 f"{base_url}/raw/main/docs/{topic}.md",
                 f"{base_url}/raw/master/docs/{topic}.md"
             ]
-            
-            for docs_url in docs_urls:
-                try:
-                    async with self._session.get(docs_url) as response:
-                        if response.status == 200:
-                            docs_content = await response.text()
-                            content_parts.append(f"# {topic.title()}\n\n{docs_content}")
-                            break
-                except Exception:
-                    continue
+        
+        # Probe README and topic docs at the same time
+        readme_content, docs_content = await asyncio.gather(
+            self._fetch_first_available(readme_urls),
+            self._fetch_first_available(docs_urls)
+        )
+        
+        content_parts = []
+        if readme_content is not None:
+            content_parts.append(f"# README\n\n{readme_content}")
+        if docs_content is not None:
+            content_parts.append(f"# {topic.title()}\n\n{docs_content}")
         
         if not content_parts:
             return None
         
         combined_content = "\n\n---\n\n".join(content_parts)
         
+        quality_score, token_count = self._score_and_count(combined_content)
         return DocumentationContent(
             library_id=library.id,
             content=combined_content,
             source_url=str(source.url),
             source_type=source.type,
             topic=topic,
-            token_count=self._count_tokens(combined_content)
+            token_count=token_count,
+            quality_score=quality_score
         )
     
+    async def _fetch_first_available(self, urls: List[str]) -> Optional[str]:
+        """Probe URLs concurrently and return the first body in list order."""
+        tasks = [asyncio.create_task(self._fetch_text(url)) for url in urls]
+        
+        try:
+            for task in tasks:
+                text = await task
+                if text is not None:
+                    return text
+            return None
+        finally:
+            # Stop probing lower-preference URLs once one has answered
+            for task in tasks:
+                task.cancel()
+    
+    async def _fetch_text(self, url: str) -> Optional[str]:
+        """Return the body of a URL that answers with HTTP 200."""
+        try:
+            async with self._session.get(url) as response:
+                if response.status == 200:
+                    body = await self._read_limited(response)
+                    return _decode_body(body, response.charset)
+        except Exception:
+            pass
+        return None
+    
+    async def _read_limited(self, response: aiohttp.ClientResponse) -> bytes:
+        """Stream a response body, stopping once MAX_DOC_SIZE_MB is reached."""
+        limit = self.settings.MAX_DOC_SIZE_MB * 1024 * 1024
+        chunks = []
+        total = 0
+        
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= limit:
+                self.logger.warning(
+                    f"Response from {response.url} exceeds {limit} bytes; truncating"
+                )
+                break
+        
+        return b"".join(chunks)[:limit]
+    
     async def _fetch_official_docs(
         self, 
         source, 
@@ -251,25 +602,29 @@ class DocumentationFetcher:
             for topic_url in topic_urls:
                 content = await self._fetch_html_content(topic_url)
                 if content:
+                    quality_score, token_count = self._score_and_count(content)
                     return DocumentationContent(
                         library_id=library.id,
                         content=content,
                         source_url=topic_url,
                         source_type=source.type,
                         topic=topic,
-                        token_count=self._count_tokens(content)
+                        token_count=token_count,
+                        quality_score=quality_score
                     )
         
         # Fallback to main documentation page
         content = await self._fetch_html_content(url)
         if content:
+            quality_score, token_count = self._score_and_count(content)
             return DocumentationContent(
                 library_id=library.id,
                 content=content,
                 source_url=url,
                 source_type=source.type,
                 topic=topic,
-                token_count=self._count_tokens(content)
+                token_count=token_count,
+                quality_score=quality_score
             )
         
         return None
@@ -293,59 +648,68 @@ class DocumentationFetcher:
         """Fetch documentation from generic sources."""
         content = await self._fetch_html_content(str(source.url))
         if content:
+            quality_score, token_count = self._score_and_count(content)
             return DocumentationContent(
                 library_id=library.id,
                 content=content,
                 source_url=str(source.url),
                 source_type=source.type,
                 topic=topic,
-                token_count=self._count_tokens(content)
+                token_count=token_count,
+                quality_score=quality_score
             )
         return None
     
     async def _fetch_html_content(self, url: str) -> Optional[str]:
         """Fetch and convert HTML content to markdown."""
+        # Pages converted earlier are revalidated instead of re-downloaded
+        page_key = self._cache_manager.get_cache_key("page", url)
+        cached_page = await self._cache_manager.get(page_key)
+        
+        headers = {}
+        if cached_page:
+            if cached_page.get("etag"):
+                headers["If-None-Match"] = cached_page["etag"]
+            if cached_page.get("last_modified"):
+                headers["If-Modified-Since"] = cached_page["last_modified"]
+        
         try:
-            async with self._session.get(url) as response:
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304 and cached_page:
+                    # Unchanged upstream; refresh the entry's TTL and reuse it
+                    await self._cache_manager.set(
+                        page_key, cached_page, ttl=self.settings.PAGE_VALIDATOR_TTL_SECONDS
+                    )
+                    return cached_page["content"]
+                
                 if response.status != 200:
                     return None
                 
-                html_content = await response.text()
-                
-                # Parse HTML and extract main content
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Remove script and style elements
-                for script in soup(["script", "style", "nav", "footer", "header"]):
-                    script.decompose()
+                html_content = await self._read_limited(response)
                 
-                # Try to find main content area
-                main_content = None
-                for selector in [
-                    'main', 
-                    '.content', 
-                    '.documentation', 
-                    '.docs', 
-                    '#content',
-                    'article',
-                    '.markdown-body'
-                ]:
-                    main_content = soup.select_one(selector)
-                    if main_content:
-                        break
-                
-                if not main_content:
-                    main_content = soup.body or soup
-                
-                # Convert to markdown
-                markdown_content = markdownify(
-                    str(main_content), 
-                    heading_style="ATX",
-                    bullets="-"
-                )
+                if self._is_text_document(url, response.content_type):
+                    # Already markdown or plain text; nothing to convert
+                    markdown_content = self._clean_markdown(
+                        _decode_body(html_content, response.charset)
+                    )
+                else:
+                    # Keep the event loop free for other sources while parsing
+                    markdown_content = await asyncio.to_thread(
+                        self._html_to_markdown, html_content, response.charset
+                    )
                 
-                # Clean up the markdown
-                markdown_content = self._clean_markdown(markdown_content)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    await self._cache_manager.set(
+                        page_key,
+                        {
+                            "etag": etag,
+                            "last_modified": last_modified,
+                            "content": markdown_content
+                        },
+                        ttl=self.settings.PAGE_VALIDATOR_TTL_SECONDS
+                    )
                 
                 return markdown_content
                 
@@ -353,19 +717,90 @@ class DocumentationFetcher:
             self.logger.error(f"Error fetching HTML from {url}: {e}")
             return None
     
+    def _html_to_markdown(self, html_content: bytes, charset: Optional[str]) -> str:
+        """Extract the main content of an HTML page as cleaned markdown."""
+        # Parse HTML and extract main content
+        main_html = self._extract_main_html(html_content, charset)
+        
+        # Convert to markdown
+        markdown_content = self._convert_to_markdown(main_html)
+        
+        # Clean up the markdown
+        return self._clean_markdown(markdown_content)
+    
+    def _is_text_document(self, url: str, content_type: str) -> bool:
+        """Check whether a response is already markdown or plain text."""
+        if content_type in TEXT_CONTENT_TYPES:
+            return True
+        
+        # Servers often label raw files generically, so fall back to the
+        # extension unless the response explicitly claims to be HTML
+        if content_type not in HTML_CONTENT_TYPES:
+            return urlparse(url).path.lower().endswith(TEXT_FILE_EXTENSIONS)
+        
+        return False
+    
+    def _convert_to_markdown(self, html: str) -> str:
+        """Convert an HTML fragment to markdown."""
+        # HTML2Text keeps parser state, so each conversion gets its own instance
+        converter = html2text.HTML2Text()
+        converter.body_width = 0
+        converter.ignore_images = True
+        converter.ul_item_mark = "-"
+        converter.emphasis_mark = "*"
+        converter.backquote_code_style = True
+        return converter.handle(html)
+    
+    def _extract_main_html(self, html_content: bytes, charset: Optional[str]) -> str:
+        """Strip page chrome and return the HTML of the main content area."""
+        if SELECTOLAX_AVAILABLE:
+            tree = LexborHTMLParser(_decode_body(html_content, charset))
+            
+            # Remove script and style elements in a single traversal
+            for node in tree.css(", ".join(STRIPPED_TAGS)):
+                node.decompose()
+            
+            # Try to find main content area
+            for selector in MAIN_CONTENT_SELECTORS:
+                node = tree.css_first(selector)
+                if node is not None:
+                    return node.html
+            
+            return (tree.body or tree.root).html
+        
+        # Trust the HTTP charset so BeautifulSoup can skip encoding detection
+        soup = BeautifulSoup(html_content, HTML_PARSER, from_encoding=charset)
+        
+        # Remove script and style elements in a single traversal; a set
+        # makes each name test O(1) and beats soupsieve's soup.select()
+        for node in soup.find_all(_STRIPPED_TAG_SET):
+            node.decompose()
+        
+        # Try to find main content area
+        main_content = None
+        for selector in MAIN_CONTENT_SELECTORS:
+            main_content = soup.select_one(selector)
+            if main_content:
+                break
+        
+        if not main_content:
+            main_content = soup.body or soup
+        
+        return str(main_content)
+    
     def _clean_markdown(self, content: str) -> str:
         """Clean and normalize markdown content."""
         # Remove excessive whitespace
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+        content = _RE_BLANKLINES.sub('\n\n', content)
         
         # Remove empty links
-        content = re.sub(r'\[\]\([^)]*\)', '', content)
+        content = _RE_EMPTY_LINK.sub('', content)
         
         # Clean up code blocks
-        content = re.sub(r'```\s*\n\s*```', '', content)
+        content = _RE_EMPTY_CODE.sub('', content)
         
         # Remove HTML comments
-        content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
+        content = _strip_html_comments(content)
         
         return content.strip()
     
@@ -379,6 +814,15 @@ class DocumentationFetcher:
         if not content_list:
             return ""
         
+        if len(content_list) == 1:
+            # Nothing to order or join when a single source was used
+            content = content_list[0]
+            if content.token_count <= max_tokens:
+                return content.content
+            if max_tokens > 100:  # Same threshold as the general case below
+                return self._truncate_content(content.content, max_tokens)
+            return ""
+        
         combined_parts = []
         current_tokens = 0
         
@@ -386,7 +830,7 @@ class DocumentationFetcher:
         content_list.sort(key=lambda x: x.quality_score, reverse=True)
         
         for content in content_list:
-            content_tokens = self._count_tokens(content.content)
+            content_tokens = content.token_count
             
             if current_tokens + content_tokens > max_tokens:
                 # Truncate this content to fit
@@ -406,23 +850,22 @@ class DocumentationFetcher:
     
     def _count_tokens(self, text: str) -> int:
         """Approximate token count."""
-        if not text:
-            return 0
-        
-        # Simple approximation: split on whitespace and punctuation
-        tokens = self._token_pattern.findall(text)
-        return len(tokens)
+        # Rule of thumb: one token per four characters, rounded up
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
     
     def _truncate_content(self, content: str, max_tokens: int) -> str:
         """Truncate content to fit within token limit."""
-        tokens = self._token_pattern.findall(content)
-        
-        if len(tokens) <= max_tokens:
+        # Non-positive limits leave nothing, rather than a negative slice
+        max_tokens = max(max_tokens, 0)
+        if self._count_tokens(content) <= max_tokens:
             return content
         
-        # Take first max_tokens tokens and try to end at a sentence boundary
-        truncated_tokens = tokens[:max_tokens]
-        truncated_text = ' '.join(truncated_tokens)
+        # Cut in the unit _count_tokens estimates in, so the result fits
+        limit = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER)
+        if limit <= 0:
+            # Too small a limit to also fit the marker
+            return content[:max_tokens * CHARS_PER_TOKEN]
+        truncated_text = content[:limit]
         
         # Try to end at a sentence
         last_period = truncated_text.rfind('.')
@@ -432,21 +875,22 @@ class DocumentationFetcher:
         if cut_point > len(truncated_text) * 0.8:  # Only if we don't lose too much
             truncated_text = truncated_text[:cut_point + 1]
         
-        return truncated_text + "\n\n[Content truncated...]"
+        return truncated_text + TRUNCATION_MARKER
     
-    def _calculate_quality_score(self, content: str) -> float:
-        """Calculate a quality score for the content."""
+    def _score_and_count(self, content: str) -> Tuple[float, int]:
+        """Return the quality score and estimated token count for content."""
         if not content:
-            return 0.0
+            return 0.0, 0
         
+        length = len(content)
         score = 0.5  # Base score
         
         # Check for code examples
-        if '```' in content or '`' in content:
+        if '`' in content:
             score += 0.2
         
         # Check for structured content (headers)
-        if re.search(r'^#+\s', content, re.MULTILINE):
+        if _RE_HEADING.search(content):
             score += 0.1
         
         # Check for links (indicates comprehensive documentation)
@@ -454,11 +898,11 @@ class DocumentationFetcher:
             score += 0.1
         
         # Penalize very short content
-        if len(content) < 500:
+        if length < 500:
             score -= 0.2
         
         # Bonus for longer, detailed content
-        if len(content) > 2000:
+        if length > 2000:
             score += 0.1
         
-        return min(1.0, max(0.0, score))
\ No newline at end of file
+        return min(1.0, max(0.0, score)), self._count_tokens(content)
\ No newline at end of file
@@ -1,27 +1,121 @@
 """Library name resolution and registry management."""
 
 import asyncio
-import json
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
 
 import aiohttp
-from fuzzywuzzy import fuzz, process
+import numpy as np
+import orjson
+from rapidfuzz import fuzz, process, utils
 
 from ..core.config import get_settings
 from ..core.models import LibraryInfo, LibraryResolutionResult, DocumentationSource, SourceType
 
 
+# rapidfuzz falls back to a pure-Python scorer (rapidfuzz.fuzz_py) when its
+# compiled extension cannot be loaded, which is far slower on every resolve
+RAPIDFUZZ_NATIVE = not fuzz.WRatio.__module__.endswith("_py")
+
+if not RAPIDFUZZ_NATIVE:
+    logging.getLogger(__name__).warning(
+        "rapidfuzz is using its pure-Python implementation; "
+        "fuzzy library matching will be slow"
+    )
+
+# Minimum fuzzy-match score (0-100) for a library to be suggested
+MIN_MATCH_SCORE = 60
+
+# Best-scoring name/id choices considered as suggestions (10 names + 10 ids before)
+MAX_FUZZY_CANDIDATES = 20
+
+# Suggestions returned per resolution
+MAX_MATCHES = 10
+
+# Resolution results remembered per normalized query
+RESOLVE_CACHE_MAX_ENTRIES = 512
+
+# Length of the character n-grams used to shortlist fuzzy-match candidates
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str) -> Set[str]:
+    """Return the character n-grams of ``text``."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class _PrefixTrie:
+    """Character trie mapping keys to the indexes of libraries they belong to."""
+    
+    _END = ""  # Never a character, so it cannot collide with a child node
+    
+    def __init__(self) -> None:
+        self._root: Dict[str, Any] = {}
+    
+    def insert(self, key: str, value: int) -> None:
+        """Associate ``value`` with ``key``."""
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, set()).add(value)
+    
+    def values_with_prefix(self, prefix: str) -> Set[int]:
+        """Return the values of every key starting with ``prefix``."""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        
+        values: Set[int] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == self._END:
+                    values.update(child)
+                else:
+                    stack.append(child)
+        return values
+
+
 class LibraryResolver:
     """Resolves library names to Context7-compatible IDs."""
     
     def __init__(self) -> None:
         self.settings = get_settings()
         self.logger = logging.getLogger(__name__)
-        self._registry: Dict[str, LibraryInfo] = {}
-        self._last_update: Optional[datetime] = None
+        self._by_id: Dict[str, LibraryInfo] = {}
+        self._by_name: Dict[str, LibraryInfo] = {}  # Keyed by lowercased name
+        # Lowercased id and its trailing "/"-separated segments, e.g.
+        # "/vercel/next.js", "vercel/next.js" and "next.js"
+        self._suffix_index: Dict[str, LibraryInfo] = {}
+        # Deduplicated libraries and fuzzy-match choices, rebuilt after ingest
+        self._libraries: List[LibraryInfo] = []
+        self._names: List[str] = []
+        self._ids: List[str] = []
+        self._choices: List[str] = []
+        self._normalized_choices: List[str] = []
+        # Hot fields as arrays parallel to self._libraries / self._choices, so
+        # ranking works on indexes and only the returned matches are touched
+        self._popularity = np.empty(0, dtype=np.float64)
+        self._choice_library_indexes = np.empty(0, dtype=np.intp)
+        # Candidate gating: name/id-segment prefixes and choice n-grams,
+        # both mapping to indexes into self._libraries
+        self._prefix_trie = _PrefixTrie()
+        self._ngram_index: Dict[str, Set[int]] = {}
+        # Memoized results, tagged with the registry version they were computed on
+        self._registry_version = 0
+        self._resolve_cache: "OrderedDict[str, Tuple[int, LibraryResolutionResult]]" = (
+            OrderedDict()
+        )
+        self._last_update: Optional[datetime] = None  # Reported in stats only
+        self._next_update_at = 0.0  # time.monotonic() deadline for the next update
         self._update_lock = asyncio.Lock()
+        self._http_session: Optional[aiohttp.ClientSession] = None
         
         # Initialize with built-in libraries
         self._initialize_builtin_libraries()
@@ -158,9 +252,79 @@ class LibraryResolver:
         ]
         
         for library in builtin_libraries:
-            self._registry[library.id] = library
-            # Also index by name for easier lookup
-            self._registry[library.name.lower()] = library
+            self._index_library(library)
+        self._rebuild_choices()
+    
+    def _index_library(self, library: LibraryInfo) -> None:
+        """Add a library to the lookup indexes."""
+        self._by_id[library.id] = library
+        # Also index by name for easier lookup
+        self._by_name[library.name.lower()] = library
+        
+        library_id = library.id.lower()
+        suffixes = [library_id]
+        suffixes.extend(
+            library_id[i + 1:] for i, char in enumerate(library_id) if char == "/"
+        )
+        for suffix in suffixes:
+            # The first library to claim a suffix keeps it, as with a linear scan
+            current = self._suffix_index.get(suffix)
+            if current is None or current.id == library.id:
+                self._suffix_index[suffix] = library
+    
+    def _rebuild_choices(self) -> None:
+        """Rebuild the deduplicated library list and fuzzy-match choices."""
+        # Results resolved against the previous registry are no longer valid
+        self._registry_version += 1
+        
+        self._libraries = list(self._by_id.values())
+        self._names = [lib.name for lib in self._libraries]
+        self._ids = [lib.id for lib in self._libraries]
+        # Names and ids scored together; each choice maps back to its library
+        self._choices = self._names + self._ids
+        self._popularity = np.fromiter(
+            (lib.popularity_score for lib in self._libraries),
+            dtype=np.float64, count=len(self._libraries)
+        )
+        self._choice_library_indexes = np.tile(
+            np.arange(len(self._libraries), dtype=np.intp), 2
+        )
+        # Lowercased, punctuation-free forms so scoring skips per-call preprocessing
+        self._normalized_choices = [utils.default_process(choice) for choice in self._choices]
+        
+        self._prefix_trie = _PrefixTrie()
+        self._ngram_index = {}
+        library_count = len(self._libraries)
+        for index, library in enumerate(self._libraries):
+            self._prefix_trie.insert(library.name.lower(), index)
+            for segment in library.id.lower().split("/"):
+                if segment:
+                    self._prefix_trie.insert(segment, index)
+            
+            for choice in (index, index + library_count):
+                for gram in _ngrams(self._normalized_choices[choice]):
+                    self._ngram_index.setdefault(gram, set()).add(index)
+    
+    def _candidate_choices(self, query: str, normalized_query: str) -> List[int]:
+        """Return the indexes of the choices worth fuzzy-scoring for a query."""
+        # Most queries are the start of a library name or id segment
+        library_indexes = self._prefix_trie.values_with_prefix(query)
+        
+        if not library_indexes:
+            # Otherwise shortlist libraries sharing at least one n-gram
+            for gram in _ngrams(normalized_query):
+                library_indexes |= self._ngram_index.get(gram, set())
+        
+        if not library_indexes:
+            if len(normalized_query) < NGRAM_SIZE:
+                # Too short to have n-grams; score everything
+                return list(range(len(self._choices)))
+            return []
+        
+        # Names come before ids, as in self._choices
+        library_count = len(self._libraries)
+        ordered = sorted(library_indexes)
+        return ordered + [index + library_count for index in ordered]
     
     async def resolve_library(self, library_name: str) -> LibraryResolutionResult:
         """Resolve a library name to Context7-compatible ID(s)."""
@@ -169,100 +333,106 @@ class LibraryResolver:
         query = library_name.lower().strip()
         self.logger.info(f"Resolving library: {query}")
         
-        # Check for exact match by ID or name
-        exact_match = None
-        if query in self._registry:
-            exact_match = self._registry[query]
-        else:
-            # Check if query matches any library ID or name exactly
-            for lib_id, library in self._registry.items():
-                if (library.name.lower() == query or 
-                    library.id.lower() == query or
-                    library.id.lower().endswith(f"/{query}")):
-                    exact_match = library
-                    break
-        
-        # Fuzzy matching for potential matches
-        library_names = [lib.name for lib in self._registry.values() if hasattr(lib, 'name')]
-        library_ids = [lib.id for lib in self._registry.values() if hasattr(lib, 'id')]
+        cached = self._resolve_cache.get(query)
+        if cached is not None:
+            version, result = cached
+            if version == self._registry_version:
+                self._resolve_cache.move_to_end(query)
+                if result.query != library_name:
+                    result = result.model_copy(update={"query": library_name})
+                return result
+            del self._resolve_cache[query]
         
-        # Get fuzzy matches
-        name_matches = process.extract(query, library_names, limit=10, scorer=fuzz.ratio)
-        id_matches = process.extract(query, library_ids, limit=10, scorer=fuzz.ratio)
+        # Check for exact match by ID, name, or trailing ID segments
+        exact_match = (
+            self._by_id.get(query)
+            or self._by_name.get(query)
+            or self._suffix_index.get(query)
+        )
         
-        # Combine and deduplicate matches
-        all_matches = []
-        seen_ids = set()
+        normalized_query = utils.default_process(query)
+        choice_indexes = self._candidate_choices(query, normalized_query)
         
-        # Add high-confidence matches
-        for match_name, score in name_matches:
-            if score >= 60:  # Minimum confidence threshold
-                for library in self._registry.values():
-                    if (hasattr(library, 'name') and 
-                        library.name == match_name and 
-                        library.id not in seen_ids):
-                        all_matches.append(library)
-                        seen_ids.add(library.id)
-                        break
+        # Score names and ids in one batch; rapidfuzz zeroes scores under the cutoff.
+        # WRatio tolerates punctuation and partial queries such as "nextjs" or "tail"
+        scores = process.cdist(
+            [normalized_query],
+            [self._normalized_choices[index] for index in choice_indexes],
+            scorer=fuzz.WRatio, score_cutoff=MIN_MATCH_SCORE
+        )[0]
+        candidates = np.flatnonzero(scores)
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
         
-        for match_id, score in id_matches:
-            if score >= 60 and match_id not in seen_ids:
-                if match_id in self._registry:
-                    library = self._registry[match_id]
-                    if hasattr(library, 'id'):
-                        all_matches.append(library)
-                        seen_ids.add(library.id)
+        # Combine and deduplicate matches, best score first
+        library_indexes = self._choice_library_indexes[
+            np.asarray(choice_indexes, dtype=np.intp)[candidates[:MAX_FUZZY_CANDIDATES]]
+        ]
+        _, first_seen = np.unique(library_indexes, return_index=True)
+        library_indexes = library_indexes[np.sort(first_seen)]
         
-        # Sort by popularity score
-        all_matches.sort(key=lambda x: x.popularity_score, reverse=True)
+        # Sort by popularity score; stable, so ties keep the best score first
+        library_indexes = library_indexes[
+            np.argsort(-self._popularity[library_indexes], kind="stable")
+        ]
         
         # Calculate confidence score
         confidence = 1.0 if exact_match else (
-            max([score/100 for _, score in name_matches + id_matches]) 
-            if name_matches or id_matches else 0.0
+            float(scores[candidates[0]]) / 100 if len(candidates) else 0.0
         )
         
-        return LibraryResolutionResult(
+        result = LibraryResolutionResult(
             query=library_name,
-            matches=all_matches[:10],  # Limit to top 10 matches
+            matches=[self._libraries[index] for index in library_indexes[:MAX_MATCHES]],
             exact_match=exact_match,
             confidence_score=confidence
         )
+        
+        self._resolve_cache[query] = (self._registry_version, result)
+        if len(self._resolve_cache) > RESOLVE_CACHE_MAX_ENTRIES:
+            self._resolve_cache.popitem(last=False)
+        
+        return result
     
     async def get_library_by_id(self, library_id: str) -> Optional[LibraryInfo]:
         """Get library information by ID."""
         await self._ensure_registry_updated()
-        return self._registry.get(library_id)
+        # Lowercased names are accepted as well, as they always have been
+        return self._by_id.get(library_id) or self._by_name.get(library_id)
     
     async def _ensure_registry_updated(self) -> None:
         """Ensure the library registry is up to date."""
-        if self._should_update_registry():
-            async with self._update_lock:
-                if self._should_update_registry():  # Double-check after acquiring lock
-                    await self._update_registry()
+        # Fast path for every resolve between updates: one float compare, no lock
+        if time.monotonic() < self._next_update_at:
+            return
+        
+        async with self._update_lock:
+            if self._should_update_registry():  # Double-check after acquiring lock
+                await self._update_registry()
     
     def _should_update_registry(self) -> bool:
         """Check if registry needs updating."""
-        if self._last_update is None:
-            return True
-        
-        update_interval = timedelta(hours=self.settings.REGISTRY_UPDATE_INTERVAL_HOURS)
-        return datetime.utcnow() - self._last_update > update_interval
+        return time.monotonic() >= self._next_update_at
     
     async def _update_registry(self) -> None:
         """Update the library registry from remote source."""
         try:
             self.logger.info("Updating library registry")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.settings.LIBRARY_REGISTRY_URL) as response:
-                    if response.status == 200:
-                        registry_data = await response.json()
-                        await self._process_registry_data(registry_data)
-                        self._last_update = datetime.utcnow()
-                        self.logger.info(f"Registry updated with {len(self._registry)} libraries")
-                    else:
-                        self.logger.warning(f"Failed to fetch registry: HTTP {response.status}")
+            # Keep the connection warm between periodic updates
+            if self._http_session is None or self._http_session.closed:
+                self._http_session = aiohttp.ClientSession()
+            
+            async with self._http_session.get(self.settings.LIBRARY_REGISTRY_URL) as response:
+                if response.status == 200:
+                    registry_data = orjson.loads(await response.read())
+                    await self._process_registry_data(registry_data)
+                    self._last_update = datetime.utcnow()
+                    self._next_update_at = (
+                        time.monotonic() + self.settings.REGISTRY_UPDATE_INTERVAL_HOURS * 3600
+                    )
+                    self.logger.info(f"Registry updated with {len(self._by_id)} libraries")
+                else:
+                    self.logger.warning(f"Failed to fetch registry: HTTP {response.status}")
                         
         except Exception as e:
             self.logger.error(f"Error updating registry: {e}")
@@ -271,46 +441,51 @@ class LibraryResolver:
     async def _process_registry_data(self, registry_data: Dict) -> None:
         """Process and merge registry data."""
         try:
-            libraries = registry_data.get("libraries", [])
+            # Validation is CPU-bound; keep the event loop free while it runs
+            libraries = await asyncio.to_thread(self._build_libraries, registry_data)
             
-            for lib_data in libraries:
-                try:
-                    # Convert sources
-                    sources = []
-                    for source_data in lib_data.get("documentation_sources", []):
-                        source = DocumentationSource(**source_data)
-                        sources.append(source)
-                    
-                    # Create library info
-                    library = LibraryInfo(
-                        id=lib_data["id"],
-                        name=lib_data["name"],
-                        description=lib_data.get("description", ""),
-                        documentation_sources=sources,
-                        repository_url=lib_data.get("repository_url"),
-                        package_manager=lib_data.get("package_manager"),
-                        tags=lib_data.get("tags", []),
-                        popularity_score=lib_data.get("popularity_score", 0.5)
-                    )
-                    
-                    self._registry[library.id] = library
-                    self._registry[library.name.lower()] = library
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error processing library {lib_data.get('id', 'unknown')}: {e}")
-                    
+            for library in libraries:
+                self._index_library(library)
+                
         except Exception as e:
             self.logger.error(f"Error processing registry data: {e}")
+        
+        self._rebuild_choices()
+    
+    def _build_libraries(self, registry_data: Dict) -> List[LibraryInfo]:
+        """Validate registry entries, skipping malformed ones."""
+        libraries = []
+        
+        for lib_data in registry_data.get("libraries", []):
+            try:
+                # Validate the library and its sources in one pydantic-core call
+                library = LibraryInfo.model_validate({
+                    "id": lib_data["id"],
+                    "name": lib_data["name"],
+                    "description": lib_data.get("description", ""),
+                    "documentation_sources": lib_data.get("documentation_sources", []),
+                    "repository_url": lib_data.get("repository_url"),
+                    "package_manager": lib_data.get("package_manager"),
+                    "tags": lib_data.get("tags", []),
+                    "popularity_score": lib_data.get("popularity_score", 0.5)
+                })
+                libraries.append(library)
+                
+            except Exception as e:
+                self.logger.warning(f"Error processing library {lib_data.get('id', 'unknown')}: {e}")
+        
+        return libraries
+    
+    async def close(self) -> None:
+        """Close the HTTP session used for registry updates."""
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
     
     def get_registry_stats(self) -> Dict[str, int]:
         """Get registry statistics."""
-        unique_libraries = set()
-        for library in self._registry.values():
-            if hasattr(library, 'id'):
-                unique_libraries.add(library.id)
-        
         return {
-            "total_entries": len(self._registry),
-            "unique_libraries": len(unique_libraries),
+            "total_entries": len(self._by_id) + len(self._by_name),
+            "unique_libraries": len(self._by_id),
             "last_update": self._last_update.isoformat() if self._last_update else None
         }
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Tests for cache manager."""
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from context7_mcp.core.cache import CacheManager
+from context7_mcp.core.cache import CacheManager, _MemoryCache
 
 
 @pytest.fixture
@@ -47,6 +49,132 @@ async def test_memory_cache_delete(cache_manager):
     assert retrieved_value is None
 
 
+@pytest.mark.asyncio
+async def test_memory_cache_set_many_get_many(cache_manager):
+    """Test bulk set and get operations."""
+    items = {"bulk:1": "value1", "bulk:2": {"nested": True}}
+    
+    await cache_manager.set_many(items, ttl=60)
+    retrieved = await cache_manager.get_many(["bulk:1", "bulk:2", "bulk:missing"])
+    
+    assert retrieved == items
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_coalesces_concurrent_misses(cache_manager):
+    """Test that concurrent misses on one key run the factory once."""
+    calls = 0
+    
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"data": "fetched"}
+    
+    results = await asyncio.gather(
+        *(cache_manager.get_or_set("test:singleflight", factory) for _ in range(5))
+    )
+    
+    assert calls == 1
+    assert all(result == {"data": "fetched"} for result in results)
+    assert await cache_manager.get("test:singleflight") == {"data": "fetched"}
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_skip_lookup(cache_manager):
+    """Test that skip_lookup computes the value without reading the cache."""
+    await cache_manager.set_raw("test:skip", b"stale")
+    
+    async def factory():
+        return b"fresh"
+    
+    with patch.object(cache_manager, "get_raw", AsyncMock()) as get_raw:
+        value = await cache_manager.get_or_set(
+            "test:skip", factory, raw=True, skip_lookup=True
+        )
+    
+    get_raw.assert_not_awaited()
+    assert value == b"fresh"
+    assert await cache_manager.get_raw("test:skip") == b"fresh"
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_survives_leader_cancellation(cache_manager):
+    """Test that cancelling the first caller does not fail the others."""
+    calls = 0
+    
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"data": "fetched"}
+    
+    leader = asyncio.create_task(cache_manager.get_or_set("test:leader", factory))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache_manager.get_or_set("test:leader", factory))
+    await asyncio.sleep(0.01)
+    
+    leader.cancel()
+    
+    assert await asyncio.wait_for(waiter, timeout=2) == {"data": "fetched"}
+    assert leader.cancelled()
+    assert calls == 1
+    assert await cache_manager.get("test:leader") == {"data": "fetched"}
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_survives_cancellation_during_cache_write(cache_manager):
+    """Test that waiters are released when the leader is cancelled mid-write."""
+    write_started = asyncio.Event()
+    original_set = cache_manager.set
+    
+    async def slow_set(key, value, ttl=None):
+        write_started.set()
+        await asyncio.sleep(0.05)
+        await original_set(key, value, ttl)
+    
+    async def factory():
+        return "fetched"
+    
+    with patch.object(cache_manager, "set", slow_set):
+        leader = asyncio.create_task(cache_manager.get_or_set("test:write", factory))
+        await write_started.wait()
+        waiter = asyncio.create_task(cache_manager.get_or_set("test:write", factory))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        
+        assert await asyncio.wait_for(waiter, timeout=2) == "fetched"
+    
+    assert await cache_manager.get("test:write") == "fetched"
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_propagates_factory_errors(cache_manager):
+    """Test that a failed factory fails every caller and is retried later."""
+    calls = 0
+    
+    async def failing_factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("fetch failed")
+    
+    results = await asyncio.gather(
+        *(cache_manager.get_or_set("test:error", failing_factory) for _ in range(3)),
+        return_exceptions=True
+    )
+    
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache_manager.get("test:error") is None
+    
+    # Nothing is left in flight, so the next miss calls the factory again
+    with pytest.raises(ValueError):
+        await cache_manager.get_or_set("test:error", failing_factory)
+    assert calls == 2
+
+
 @pytest.mark.asyncio
 async def test_memory_cache_clear(cache_manager):
     """Test clearing memory cache."""
@@ -59,6 +187,22 @@ async def test_memory_cache_clear(cache_manager):
     assert await cache_manager.get("key2") is None
 
 
+def test_memory_cache_keeps_frequent_entries():
+    """Test that one-off keys do not evict frequently used entries."""
+    memory_cache = _MemoryCache(capacity=100)
+    
+    for _ in range(5):
+        memory_cache.set("hot", {"value": "hot"})
+        assert memory_cache.get("hot") is not None
+    
+    # Scan far more one-off keys than the cache can hold
+    for i in range(1000):
+        memory_cache.set(f"scan:{i}", {"value": i})
+    
+    assert len(memory_cache) <= 100
+    assert memory_cache.get("hot") == {"value": "hot"}
+
+
 @pytest.mark.asyncio
 async def test_cache_key_generation(cache_manager):
     """Test cache key generation."""
@@ -76,6 +220,21 @@ async def test_cache_stats(cache_manager):
     assert stats["type"] in ["redis", "memory"]
 
 
+@pytest.mark.asyncio
+async def test_memory_cache_size_tracking(cache_manager):
+    """Test that the memory cache size estimate follows sets and deletes."""
+    await cache_manager.set("size:1", "x" * 1024)
+    await cache_manager.set_raw("size:2", b"y" * 2048)
+    assert cache_manager._memory_cache.size_bytes == 3072
+    
+    await cache_manager.set("size:1", "x" * 512)
+    await cache_manager.delete("size:2")
+    assert cache_manager._memory_cache.size_bytes == 512
+    
+    await cache_manager.clear()
+    assert cache_manager._memory_cache.size_bytes == 0
+
+
 @pytest.mark.asyncio
 async def test_cache_expiration():
     """Test cache expiration."""
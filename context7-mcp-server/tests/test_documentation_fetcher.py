@@ -0,0 +1,342 @@
+"""Tests for documentation fetcher."""
+
+import asyncio
+import random
+import re
+
+import orjson
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, patch
+
+from context7_mcp.tools import documentation_fetcher as fetcher_module
+from context7_mcp.tools.documentation_fetcher import (
+    DocumentationFetcher,
+    TOKEN_BUDGET_BUCKETS,
+    TRUNCATION_MARKER,
+    _pack_payload,
+    _strip_html_comments,
+    _token_budget,
+    _unpack_payload,
+)
+from context7_mcp.core.cache import CacheManager
+from context7_mcp.core.models import DocumentationResponse
+
+# Reference implementation _strip_html_comments must agree with
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
+@pytest.fixture
+async def documentation_fetcher():
+    """Create a documentation fetcher instance."""
+    fetcher = DocumentationFetcher()
+    yield fetcher
+    await fetcher.close()
+
+
+def make_response(content: str, token_count: int) -> DocumentationResponse:
+    """Build a documentation response around the given content."""
+    return DocumentationResponse(
+        library_id="/test/library",
+        content=content,
+        sources=["https://example.com/docs"],
+        token_count=token_count,
+        quality_score=0.5
+    )
+
+
+@pytest.mark.parametrize("max_tokens, expected", [
+    (1, 1000),
+    (1000, 1000),
+    (1001, 2000),
+    (10000, 16000),
+    (32000, 32000),
+    (50000, 50000),
+])
+def test_token_budget(max_tokens, expected):
+    """Test rounding token limits up to the cache budget ladder."""
+    assert _token_budget(max_tokens) == expected
+
+
+def test_token_budget_buckets_cover_limit():
+    """Test that every limit maps to a budget at least as large."""
+    for max_tokens in range(1, TOKEN_BUDGET_BUCKETS[-1] + 2, 97):
+        assert _token_budget(max_tokens) >= max_tokens
+
+
+def test_fit_to_budget_keeps_small_response(documentation_fetcher):
+    """Test that responses within the limit are returned unchanged."""
+    response = make_response("short content", token_count=4)
+    
+    assert documentation_fetcher._fit_to_budget(response, 500) is response
+
+
+@pytest.mark.parametrize("max_tokens", [5, 100, 500, 629, 1000])
+def test_fit_to_budget_truncates_to_limit(documentation_fetcher, max_tokens):
+    """Test that truncated responses never exceed the caller's limit."""
+    content = "\n\n".join(
+        f"## Section {i}\n\nSome `code` and prose, with punctuation: a.b(c); d[e]!"
+        for i in range(400)
+    )
+    response = make_response(content, documentation_fetcher._count_tokens(content))
+    
+    fitted = documentation_fetcher._fit_to_budget(response, max_tokens)
+    
+    assert fitted.token_count <= max_tokens
+    assert fitted.token_count == documentation_fetcher._count_tokens(fitted.content)
+    assert content.startswith(fitted.content.removesuffix(TRUNCATION_MARKER))
+    if max_tokens * 4 > len(TRUNCATION_MARKER):
+        assert fitted.content.endswith(TRUNCATION_MARKER)
+
+
+def test_local_cache_entries_expire(documentation_fetcher):
+    """Test that per-process cache entries expire on their monotonic TTL."""
+    ttl = documentation_fetcher.settings.LOCAL_CACHE_TTL_SECONDS
+    response = make_response("local docs", token_count=3)
+    
+    with patch.object(fetcher_module, "time") as clock:
+        clock.monotonic.return_value = 1000.0
+        documentation_fetcher._local_set("docs:key", response)
+        
+        clock.monotonic.return_value = 1000.0 + ttl
+        cached = documentation_fetcher._local_get("docs:key")
+        assert cached is not None
+        assert cached.cached is True
+        
+        clock.monotonic.return_value = 1000.0 + ttl + 1
+        assert documentation_fetcher._local_get("docs:key") is None
+        assert "docs:key" not in documentation_fetcher._local_cache
+
+
+@pytest.mark.parametrize("max_tokens", [0, -5])
+def test_truncate_content_non_positive_limit(documentation_fetcher, max_tokens):
+    """Test that non-positive token limits truncate to nothing."""
+    content = "Some documentation. " * 600
+    
+    assert documentation_fetcher._truncate_content(content, max_tokens) == ""
+
+
+@pytest.mark.parametrize("content, link_bonus", [
+    ("See [the guide](https://example.com/guide).", True),
+    ("x](y", False),
+    ("[x] but no link", False),
+])
+def test_score_link_bonus(documentation_fetcher, content, link_bonus):
+    """Test that only content with markdown links gets the link bonus."""
+    score, _ = documentation_fetcher._score_and_count(content)
+    
+    # Short plain content scores 0.5 base minus the 0.2 short-content penalty
+    assert score == pytest.approx(0.4 if link_bonus else 0.3)
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "no comments here",
+    "before <!-- comment --> after",
+    "<!-- leading -->text",
+    "text<!-- trailing -->",
+    "a <!-- one --> b <!-- two --> c",
+    "outer <!-- nested <!-- inner --> still --> out",
+    "unclosed <!-- runs to the end",
+    "closed <!-- x --> then unclosed <!-- y",
+    "unclosed <!-- first then <!-- closed --> end",
+    "empty <!----> comment",
+    "short <!---> not closed",
+    "short <!---> closed later -->",
+    "dashes <!-- a -- b ---> end",
+    "multi <!-- line\none\nline two\n--> line",
+    "stray --> terminator <!-- then comment -->",
+    "<!--<!--<!---->-->-->",
+])
+def test_strip_html_comments_matches_regex(content):
+    """Test that comment stripping matches the non-greedy DOTALL regex."""
+    assert _strip_html_comments(content) == HTML_COMMENT_PATTERN.sub("", content)
+
+
+def test_strip_html_comments_matches_regex_on_random_input():
+    """Test comment stripping against the regex on random fragments."""
+    rng = random.Random(7)
+    fragments = ["<!--", "-->", "<!", "--", "-", ">", "<", "a", "\n"]
+    
+    for _ in range(2000):
+        content = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 12)))
+        assert _strip_html_comments(content) == HTML_COMMENT_PATTERN.sub("", content)
+
+
+def test_payload_round_trip():
+    """Test that packed payloads unpack to the original JSON bytes."""
+    payload = orjson.dumps({"content": "docs " * 200, "token_count": 250})
+    packed = _pack_payload(payload)
+    
+    assert packed[:1] == (b"z" if fetcher_module.ZSTD_AVAILABLE else b"j")
+    assert _unpack_payload(packed) == payload
+
+
+def test_payload_without_zstd():
+    """Test payloads written and read by an instance without zstandard."""
+    payload = orjson.dumps({"content": "docs"})
+    
+    with patch.object(fetcher_module, "ZSTD_AVAILABLE", False):
+        packed = _pack_payload(payload)
+        assert packed == b"j" + payload
+        assert _unpack_payload(packed) == payload
+        # Compressed entries from other instances cannot be read
+        assert _unpack_payload(b"z" + b"\x28\xb5\x2f\xfd") is None
+
+
+def test_payload_legacy_entry():
+    """Test that entries cached before the marker byte are read verbatim."""
+    payload = orjson.dumps({"content": "legacy"})
+    
+    assert _unpack_payload(payload) == payload
+
+
+@pytest.mark.asyncio
+async def test_fetch_replaces_baseline_cache_entry(documentation_fetcher):
+    """Test that entries in the old cache wrapper format are refetched."""
+    cache_manager = CacheManager()
+    await cache_manager.initialize()
+    documentation_fetcher._cache_manager = cache_manager
+    
+    # Written by the cache manager before payloads were stored verbatim
+    cache_key = cache_manager.get_cache_key("docs", "/test/library", "default", "1000")
+    await cache_manager.set_raw(cache_key, orjson.dumps({
+        "value": {"library_id": "/test/library", "content": "old docs"},
+        "expires_at": "2030-01-01T00:00:00",
+        "created_at": "2024-01-01T00:00:00"
+    }))
+    
+    fresh = make_response("fresh docs", token_count=3)
+    fetch_uncached = AsyncMock(
+        return_value=_pack_payload(orjson.dumps(fresh.model_dump(mode="json")))
+    )
+    with patch.object(documentation_fetcher, "_fetch_uncached", fetch_uncached):
+        result = await documentation_fetcher.fetch_documentation(
+            "/test/library", max_tokens=1000
+        )
+    
+    fetch_uncached.assert_awaited_once()
+    assert result.content == "fresh docs"
+    assert _unpack_payload(await cache_manager.get_raw(cache_key)) == orjson.dumps(
+        fresh.model_dump(mode="json")
+    )
+    
+    await cache_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_html_content_revalidates_and_skips_text(documentation_fetcher):
+    """Test ETag revalidation of HTML pages and pass-through of markdown."""
+    page_etag = '"page-v1"'
+    seen_requests = []
+    
+    async def page(request):
+        seen_requests.append(("/page", request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == page_etag:
+            return web.Response(status=304, headers={"ETag": page_etag})
+        return web.Response(
+            text="<html><body><main><h1>Guide</h1><p>Hello docs</p></main></body></html>",
+            content_type="text/html",
+            headers={"ETag": page_etag}
+        )
+    
+    async def markdown(request):
+        seen_requests.append(("/md", request.headers.get("If-None-Match")))
+        return web.Response(text="# Notes\n\nAlready *markdown*.", content_type="text/markdown")
+    
+    app = web.Application()
+    app.router.add_get("/page", page)
+    app.router.add_get("/md", markdown)
+    
+    cache_manager = CacheManager()
+    await cache_manager.initialize()
+    documentation_fetcher._cache_manager = cache_manager
+    await documentation_fetcher._ensure_session()
+    
+    async with TestServer(app) as server:
+        page_url = str(server.make_url("/page"))
+        markdown_url = str(server.make_url("/md"))
+        
+        with patch.object(
+            documentation_fetcher, "_html_to_markdown",
+            wraps=documentation_fetcher._html_to_markdown
+        ) as html_to_markdown:
+            first = await documentation_fetcher._fetch_html_content(page_url)
+            second = await documentation_fetcher._fetch_html_content(page_url)
+            text = await documentation_fetcher._fetch_html_content(markdown_url)
+    
+    await cache_manager.close()
+    
+    assert "Hello docs" in first
+    assert second == first
+    # The second fetch sent the stored validator and was answered with a 304
+    assert seen_requests == [("/page", None), ("/page", page_etag), ("/md", None)]
+    # Only the HTML page went through conversion; markdown is used as-is
+    html_to_markdown.assert_called_once()
+    assert text == "# Notes\n\nAlready *markdown*."
+
+
+@pytest.mark.asyncio
+async def test_shared_session_closed_by_last_holder():
+    """Test that the shared session stays open until every holder closes."""
+    first = DocumentationFetcher()
+    second = DocumentationFetcher()
+    
+    session = await first._ensure_session()
+    assert await second._ensure_session() is session
+    
+    await first.close()
+    assert not session.closed
+    
+    await second.close()
+    assert session.closed
+    assert DocumentationFetcher._session is None
+
+
+@pytest.mark.asyncio
+async def test_stale_session_closed_on_loop_change(documentation_fetcher):
+    """Test that a session from a previous event loop is closed, not leaked."""
+    previous_loop = asyncio.new_event_loop()
+    try:
+        stale_session = await documentation_fetcher._ensure_session()
+        DocumentationFetcher._session_loop = previous_loop
+        
+        session = await documentation_fetcher._ensure_session()
+        
+        assert session is not stale_session
+        assert stale_session.closed
+        assert not session.closed
+    finally:
+        previous_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_stops_at_size_cap(documentation_fetcher):
+    """Test that bodies over MAX_DOC_SIZE_MB are cut off while streaming."""
+    chunk = b"x" * 65536
+    total_chunks = 1024  # 64 MB, far more than socket buffers can absorb
+    chunks_sent = 0
+    
+    async def huge(request):
+        nonlocal chunks_sent
+        response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+        await response.prepare(request)
+        try:
+            for _ in range(total_chunks):
+                await response.write(chunk)
+                chunks_sent += 1
+        except (ConnectionError, RuntimeError):
+            pass  # The client hung up once it had enough
+        return response
+    
+    app = web.Application()
+    app.router.add_get("/huge", huge)
+    await documentation_fetcher._ensure_session()
+    
+    with patch.object(documentation_fetcher.settings, "MAX_DOC_SIZE_MB", 1):
+        async with TestServer(app) as server:
+            text = await documentation_fetcher._fetch_text(str(server.make_url("/huge")))
+    
+    assert len(text) == 1024 * 1024
+    assert chunks_sent < total_chunks
@@ -1,19 +1,26 @@
 """Tests for library resolver."""
 
 import pytest
+import pytest_asyncio
 from unittest.mock import AsyncMock, patch
 
 from context7_mcp.tools.library_resolver import LibraryResolver
 from context7_mcp.core.models import LibraryInfo, SourceType, DocumentationSource
 
 
-@pytest.fixture
-def library_resolver():
-    """Create a library resolver instance."""
-    return LibraryResolver()
+# Tests using it must run on the same module-scoped event loop
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def library_resolver():
+    """Create a library resolver instance shared by the module's tests.
+    
+    The tests only read from it, so building the builtin registry once is enough.
+    """
+    resolver = LibraryResolver()
+    yield resolver
+    await resolver.close()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_resolve_exact_match(library_resolver):
     """Test exact library name resolution."""
     result = await library_resolver.resolve_library("Next.js")
@@ -24,7 +31,7 @@ async def test_resolve_exact_match(library_resolver):
     assert result.confidence_score == 1.0
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_resolve_fuzzy_match(library_resolver):
     """Test fuzzy library name resolution."""
     result = await library_resolver.resolve_library("nextjs")
@@ -34,7 +41,17 @@ async def test_resolve_fuzzy_match(library_resolver):
     assert result.confidence_score > 0.0
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
+async def test_resolve_prefix_match(library_resolver):
+    """Test resolution of a partial library name."""
+    result = await library_resolver.resolve_library("tail")
+    
+    assert result.exact_match is None
+    assert [match.id for match in result.matches] == ["/tailwindlabs/tailwindcss"]
+    assert result.confidence_score > 0.0
+
+
+@pytest.mark.asyncio(loop_scope="module")
 async def test_resolve_no_match(library_resolver):
     """Test resolution with no matches."""
     result = await library_resolver.resolve_library("nonexistent-library-xyz")
@@ -44,7 +61,7 @@ async def test_resolve_no_match(library_resolver):
     assert result.confidence_score == 0.0
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_library_by_id(library_resolver):
     """Test getting library by ID."""
     library = await library_resolver.get_library_by_id("/vercel/next.js")
@@ -54,7 +71,7 @@ async def test_get_library_by_id(library_resolver):
     assert library.name == "Next.js"
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_library_by_invalid_id(library_resolver):
     """Test getting library with invalid ID."""
     library = await library_resolver.get_library_by_id("/invalid/library")
@@ -72,7 +89,7 @@ def test_registry_stats(library_resolver):
     assert stats["unique_libraries"] > 0
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_builtin_libraries_loaded(library_resolver):
     """Test that builtin libraries are loaded."""
     expected_libraries = [
@@ -87,4 +104,29 @@ async def test_builtin_libraries_loaded(library_resolver):
     for lib_id in expected_libraries:
         library = await library_resolver.get_library_by_id(lib_id)
         assert library is not None
-        assert library.id == lib_id
\ No newline at end of file
+        assert library.id == lib_id
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_resolve_cache_invalidated_by_registry_update():
+    """Test that memoized resolutions are dropped when the registry changes."""
+    resolver = LibraryResolver()
+    resolver._next_update_at = float("inf")  # Keep the test offline
+    
+    try:
+        first = await resolver.resolve_library("pydantic")
+        assert first.matches == []
+        assert await resolver.resolve_library("pydantic") is first
+        
+        await resolver._process_registry_data({"libraries": [{
+            "id": "/pydantic/pydantic",
+            "name": "Pydantic",
+            "documentation_sources": [
+                {"url": "https://docs.pydantic.dev", "type": "official_docs", "priority": 1}
+            ]
+        }]})
+        
+        updated = await resolver.resolve_library("pydantic")
+        assert updated.exact_match is not None
+        assert updated.exact_match.id == "/pydantic/pydantic"
+    finally:
+        await resolver.close()
@@ -1,16 +1,25 @@
 """Tests for MCP server."""
 
+import asyncio
 import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 from unittest.mock import AsyncMock, patch
 
+import context7_mcp
 from context7_mcp.core.server import Context7MCPServer
 
 
 @pytest.fixture
-def mcp_server():
+async def mcp_server():
     """Create an MCP server instance."""
-    return Context7MCPServer()
+    server = Context7MCPServer()
+    yield server
+    await server.close()
 
 
 @pytest.mark.asyncio
@@ -190,4 +199,73 @@ def test_create_error_response(mcp_server):
     assert response["jsonrpc"] == "2.0"
     assert response["id"] == "123"
     assert response["error"]["code"] == -32600
-    assert response["error"]["message"] == "Invalid Request"
\ No newline at end of file
+    assert response["error"]["message"] == "Invalid Request"
+
+
+@pytest.mark.asyncio
+async def test_stdio_skips_oversized_line(mcp_server):
+    """Test that an oversized line yields one parse error before the next request."""
+    reader = asyncio.StreamReader(limit=64)
+    written = []
+    
+    async def feed():
+        # The oversized line's newline arrives only after the limit is hit
+        reader.feed_data(b'{"padding": "' + b"x" * 200)
+        await asyncio.sleep(0.01)
+        reader.feed_data(b"x" * 200 + b'"}\n')
+        reader.feed_data(b'{"jsonrpc": "2.0", "id": "9", "method": "tools/list"}\n')
+        reader.feed_eof()
+    
+    async def open_stdin():
+        return lambda: mcp_server._read_stream_line(reader)
+    
+    with patch.object(mcp_server, "_open_stdin", open_stdin), \
+            patch.object(mcp_server, "_write_message", written.append):
+        await asyncio.gather(mcp_server.run_stdio(), feed())
+    
+    assert len(written) == 2
+    assert written[0]["error"]["code"] == -32700
+    assert written[1]["id"] == "9"
+    assert "tools" in written[1]["result"]
+
+
+def run_stdio_subprocess(stdin) -> subprocess.CompletedProcess:
+    """Run the server's STDIO transport in a subprocess with the given stdin."""
+    env = dict(os.environ)
+    src_dir = str(Path(context7_mcp.__file__).resolve().parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    
+    return subprocess.run(
+        [sys.executable, "-m", "context7_mcp.main"],
+        stdin=stdin,
+        capture_output=True,
+        env=env,
+        timeout=60
+    )
+
+
+def test_stdio_reads_requests_from_file(tmp_path):
+    """Test the STDIO transport with stdin redirected from a regular file."""
+    requests_file = tmp_path / "requests.jsonl"
+    requests_file.write_text(
+        json.dumps({"jsonrpc": "2.0", "id": "8", "method": "tools/list"}) + "\n"
+    )
+    
+    with requests_file.open("rb") as stdin:
+        completed = run_stdio_subprocess(stdin)
+    
+    assert completed.returncode == 0
+    # Log output shares stdout with the JSON-RPC responses
+    responses = [
+        json.loads(line) for line in completed.stdout.splitlines()
+        if line.startswith(b"{")
+    ]
+    assert [response["id"] for response in responses] == ["8"]
+    assert "tools" in responses[0]["result"]
+
+
+def test_stdio_handles_character_device_stdin():
+    """Test the STDIO transport with stdin redirected from /dev/null."""
+    completed = run_stdio_subprocess(subprocess.DEVNULL)
+    
+    assert completed.returncode == 0